@@ -0,0 +1,3 @@
+# Keep stand-alone example servers out of test collection; importing them
+# builds a second Flask app.
+collect_ignore_glob = ['examples/*']
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Simple test API for VPN system
+Mock VPN API returning canned responses, for exercising the web client
+without a database or WireGuard. Not part of the test suite.
 """
 
 from flask import Flask, jsonify
@@ -6,37 +6,185 @@ A comprehensive API for managing WireGuard VPN connections, users, and monitorin
 
 import os
 import json
+import base64
+import functools
+import hashlib
+import hmac
 import subprocess
 import logging
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-from flask import Flask, request, jsonify, send_file
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache, cached
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import check_password_hash
+import orjson
 import psutil
-import qrcode
+import segno
 from io import BytesIO
 
+try:
+    from pyroute2 import WireGuard
+    from pyroute2.netlink.exceptions import NetlinkError
+except ImportError:  # pyroute2 is Linux-only
+    WireGuard = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which encodes datetimes natively."""
+
+    options = orjson.OPT_NAIVE_UTC
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.options), mimetype='application/json'
+        )
+
+def engine_options(database_uri: str) -> Dict:
+    """Connection pool settings for the configured database backend."""
+    if database_uri.startswith('sqlite'):
+        # Flask-SQLAlchemy already shares one StaticPool connection for
+        # in-memory databases; file databases are pooled across threads.
+        return {'connect_args': {'check_same_thread': False}}
+    
+    # Keep connections open between requests instead of reconnecting, and
+    # recycle them before server-side idle timeouts close them.
+    return {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_recycle': 1800,
+        'pool_pre_ping': False
+    }
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling so SQLite readers don't block behind writers."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.getenv('JWT_SECRET', 'your-secret-key-change-this')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///:memory:')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that memoizes verified token claims for a few seconds.
+
+    Every protected request would otherwise repeat the signature check and
+    claim validation for the same bearer token. Verified claims are cached
+    keyed by a digest of the token; entries never outlive the token's own
+    expiry, and the short TTL bounds how long a revoked token stays usable.
+    """
+
+    TOKEN_CACHE_TTL = 5
+
+    def __init__(self, app=None, add_context_processor=False):
+        self._token_cache = TTLCache(maxsize=10000, ttl=self.TOKEN_CACHE_TTL)
+        self._token_cache_lock = threading.Lock()
+        super().__init__(app, add_context_processor)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = hashlib.sha256(encoded_token.encode()).digest()[:16]
+        with self._token_cache_lock:
+            claims = self._token_cache.get(key)
+        if claims is not None and claims.get('exp', 0) > time.time():
+            return claims
+
+        claims = super()._decode_jwt_from_config(encoded_token)
+        with self._token_cache_lock:
+            self._token_cache[key] = claims
+        return claims
 
 # Initialize extensions
 db = SQLAlchemy(app)
-jwt = JWTManager(app)
+jwt = CachingJWTManager(app)
 CORS(app, origins=['http://localhost:4200', 'http://127.0.0.1:4200'], 
      allow_headers=['Content-Type', 'Authorization'], 
-     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+     expose_headers=['X-Next-Cursor'],
+     max_age=86400)  # Let browsers reuse preflight results for a day
+
+# Largest page of clients returned by GET /api/clients
+MAX_CLIENTS_PAGE_SIZE = 500
+
+# Host octets handed to clients in 10.0.0.0/24 (.1 is the server)
+CLIENT_IP_OCTETS = range(2, 255)
+
+# Status snapshots served by /api/status, shared across requests
+STATUS_CACHE = TTLCache(maxsize=1, ttl=2)
+STATUS_CACHE_LOCK = threading.Lock()
+
+# Seconds between background status refreshes; 0 disables the collector
+STATUS_REFRESH_INTERVAL = float(os.getenv('STATUS_REFRESH_INTERVAL', '1'))
+# Seconds without a status request after which the collector stops
+STATUS_IDLE_TIMEOUT = float(os.getenv('STATUS_IDLE_TIMEOUT', '60'))
+_status_collector = None
+_status_last_polled = 0.0
+_status_collector_lock = threading.Lock()
+
+# Interfaces read over WireGuard's netlink API, and the per-process socket
+WIREGUARD_INTERFACES = [name for name in os.getenv('WG_INTERFACES', 'wg0').split(',') if name]
+_wg_netlink = None
+_wg_netlink_available = WireGuard is not None
+_wg_netlink_lock = threading.Lock()
+
+# Argon2id costs. argon2-cffi's defaults take 64 MiB and 4 lanes per hash;
+# these follow OWASP's 19 MiB / 2 passes / 1 lane profile so concurrent
+# logins fit in the pod's memory limit.
+PASSWORD_HASHER = PasswordHasher(
+    time_cost=int(os.getenv('ARGON2_TIME_COST', '2')),
+    memory_cost=int(os.getenv('ARGON2_MEMORY_COST_KIB', '19456')),
+    parallelism=int(os.getenv('ARGON2_PARALLELISM', '1'))
+)
+# argon2 releases the GIL, so bound how many hashes a worker runs at once
+PASSWORD_HASH_SLOTS = threading.BoundedSemaphore(int(os.getenv('ARGON2_MAX_CONCURRENT', '2')))
+
+# Recently verified logins, keyed by an HMAC of the credentials
+LOGIN_CACHE = TTLCache(maxsize=1024, ttl=60)
+LOGIN_CACHE_LOCK = threading.Lock()
+
+# Public settings of the active VPN server used for client configs
+ACTIVE_SERVER_CACHE = TTLCache(maxsize=1, ttl=30)
+ACTIVE_SERVER_CACHE_LOCK = threading.Lock()
+
+# Prime psutil so non-blocking cpu_percent() calls report usage since the
+# previous call instead of sleeping for a sampling interval.
+psutil.cpu_percent(interval=None)
 
 # Database Models
 class User(db.Model):
@@ -49,10 +197,25 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        with PASSWORD_HASH_SLOTS:
+            self.password_hash = PASSWORD_HASHER.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not self.password_hash.startswith('$argon2'):
+            # Legacy werkzeug (pbkdf2/scrypt) hash: upgrade it on success
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+        
+        try:
+            with PASSWORD_HASH_SLOTS:
+                PASSWORD_HASHER.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if PASSWORD_HASHER.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
 class VPNClient(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -66,7 +229,21 @@ class VPNClient(db.Model):
     bytes_received = db.Column(db.BigInteger, default=0)
     bytes_sent = db.Column(db.BigInteger, default=0)
 
+    def __init__(self, **kwargs):
+        # Column defaults only apply on INSERT; mirror them on new objects
+        kwargs.setdefault('is_active', True)
+        kwargs.setdefault('bytes_received', 0)
+        kwargs.setdefault('bytes_sent', 0)
+        super().__init__(**kwargs)
+
 class VPNServer(db.Model):
+    __table_args__ = (
+        # Partial index backing the active-server lookup in get_active_server()
+        db.Index('ix_vpn_server_active', 'is_active',
+                 postgresql_where=db.text('is_active'),
+                 sqlite_where=db.text('is_active = 1')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
     public_key = db.Column(db.String(44), unique=True, nullable=False)
@@ -76,7 +253,123 @@ class VPNServer(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class IPPool(db.Model):
+    """Last host octet allocated in the client subnet.
+
+    The single row (id 1) is seeded by create_tables() and doubles as the
+    lock that serialises allocate_client_ip().
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    last_octet = db.Column(db.Integer, nullable=False, default=1)
+
+@event.listens_for(Session, 'after_flush')
+def track_server_writes(session, flush_context):
+    """Note that this transaction wrote a VPNServer row."""
+    if any(isinstance(obj, VPNServer)
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['active_server_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def invalidate_active_server(session):
+    """Drop the cached active server once a VPNServer write commits.
+
+    Clearing at commit rather than flush keeps other requests from caching
+    the old row again in between. A rollback clears too, in case this
+    session cached its own uncommitted row. Core writes through
+    VPNServer.__table__ bypass the ORM session and are not tracked.
+    """
+    if session.info.pop('active_server_changed', False):
+        with ACTIVE_SERVER_CACHE_LOCK:
+            ACTIVE_SERVER_CACHE.clear()
+
 # Utility Functions
+def parse_wireguard_dump(output: str) -> Dict:
+    """Parse `wg show all dump` output into per-interface peer lists.
+
+    Interface rows carry 5 tab-separated fields; peer rows carry 9:
+    interface, public key, preshared key, endpoint, allowed IPs,
+    latest handshake, rx bytes, tx bytes and persistent keepalive.
+    """
+    interfaces: Dict[str, Dict] = {}
+    for line in output.splitlines():
+        parts = line.split('\t')
+        if len(parts) == 5:  # Interface row
+            interfaces.setdefault(parts[0], {'peers': []})
+            continue
+        if len(parts) < 9:
+            continue
+
+        iface, public_key, _, endpoint, allowed_ips, handshake, rx, tx, keepalive = parts[:9]
+        interfaces.setdefault(iface, {'peers': []})['peers'].append({
+            'public_key': public_key,
+            'endpoint': endpoint,
+            'allowed_ips': allowed_ips,
+            'latest_handshake': handshake,
+            'transfer_rx': int(rx) if rx else 0,
+            'transfer_tx': int(tx) if tx else 0,
+            'persistent_keepalive': keepalive
+        })
+    return interfaces
+
+def _peer_from_netlink(peer) -> Dict:
+    """Convert a netlink peer message to the fields `wg show dump` reports."""
+    endpoint = peer.get_attr('WGPEER_A_ENDPOINT')
+    if endpoint:
+        addr = endpoint['addr']
+        endpoint = f"[{addr}]:{endpoint['port']}" if ':' in addr else f"{addr}:{endpoint['port']}"
+    handshake = peer.get_attr('WGPEER_A_LAST_HANDSHAKE_TIME')
+    allowed_ips = peer.get_attr('WGPEER_A_ALLOWEDIPS') or []
+    keepalive = peer.get_attr('WGPEER_A_PERSISTENT_KEEPALIVE_INTERVAL')
+    return {
+        'public_key': peer.get_attr('WGPEER_A_PUBLIC_KEY').decode(),
+        'endpoint': endpoint or '(none)',
+        'allowed_ips': ','.join(ip['addr'] for ip in allowed_ips) or '(none)',
+        'latest_handshake': str(handshake['tv_sec'] if handshake else 0),
+        'transfer_rx': peer.get_attr('WGPEER_A_RX_BYTES') or 0,
+        'transfer_tx': peer.get_attr('WGPEER_A_TX_BYTES') or 0,
+        'persistent_keepalive': str(keepalive) if keepalive else 'off'
+    }
+
+def read_wireguard_netlink() -> Optional[Dict]:
+    """Read peers through WireGuard's generic netlink API.
+
+    Keeps one netlink socket per process instead of forking `wg` for every
+    read. Returns None when netlink is unavailable so callers can fall back
+    to the CLI.
+    """
+    global _wg_netlink, _wg_netlink_available
+    if not _wg_netlink_available:
+        return None
+    
+    with _wg_netlink_lock:
+        # Another thread may have given up on netlink while we waited
+        if not _wg_netlink_available:
+            return None
+        try:
+            if _wg_netlink is None:
+                _wg_netlink = WireGuard()
+        except (NetlinkError, OSError) as e:
+            # No WireGuard genetlink family (module not loaded, no permission)
+            logger.info(f"WireGuard netlink unavailable, using wg CLI: {e}")
+            _wg_netlink_available = False
+            return None
+        
+        try:
+            interfaces: Dict[str, Dict] = {}
+            for name in WIREGUARD_INTERFACES:
+                peers = interfaces.setdefault(name, {'peers': []})['peers']
+                for msg in _wg_netlink.info(name):
+                    peers.extend(_peer_from_netlink(peer)
+                                 for peer in msg.get_attr('WGDEVICE_A_PEERS') or [])
+            return interfaces
+        except (NetlinkError, OSError) as e:
+            logger.error(f"Error reading WireGuard status over netlink: {e}")
+            _wg_netlink.close()
+            _wg_netlink = None
+            return None
+
+@cached(TTLCache(maxsize=1, ttl=2), lock=threading.Lock())
 def get_wireguard_status():
     """Get current WireGuard status and statistics."""
     try:
@@ -100,33 +393,14 @@ def get_wireguard_status():
                 }
             }
         
-        # Try to run WireGuard command on Unix-like systems
+        status = read_wireguard_netlink()
+        if status is not None:
+            return status
+        
+        # Fall back to the WireGuard CLI
         result = subprocess.run(['wg', 'show', 'all', 'dump'], 
                               capture_output=True, text=True, check=True)
-        lines = result.stdout.strip().split('\n')
-        
-        interfaces = {}
-        for line in lines:
-            if line:
-                parts = line.split('\t')
-                if len(parts) >= 5:
-                    interface = parts[0]
-                    if interface not in interfaces:
-                        interfaces[interface] = {'peers': []}
-                    
-                    if len(parts) >= 8:  # Peer data
-                        peer = {
-                            'public_key': parts[1],
-                            'endpoint': parts[2],
-                            'allowed_ips': parts[3],
-                            'latest_handshake': parts[4],
-                            'transfer_rx': int(parts[5]) if parts[5] else 0,
-                            'transfer_tx': int(parts[6]) if parts[6] else 0,
-                            'persistent_keepalive': parts[7] if len(parts) > 7 else 0
-                        }
-                        interfaces[interface]['peers'].append(peer)
-        
-        return interfaces
+        return parse_wireguard_dump(result.stdout)
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         logger.error(f"Error getting WireGuard status: {e}")
         # Return mock data if WireGuard is not available
@@ -146,17 +420,196 @@ def get_wireguard_status():
             }
         }
 
+def authenticate(username: str, password: str) -> Optional[User]:
+    """Return the user matching the credentials, or None.
+
+    Password hashing is deliberately slow, so successful verifications are
+    remembered for a minute. A cached entry is only honoured while the
+    user's stored hash is unchanged, so changing the password invalidates it.
+    """
+    key = hmac.new(app.config['SECRET_KEY'].encode(),
+                   f"{username}\0{password}".encode(), hashlib.sha256).digest()
+    with LOGIN_CACHE_LOCK:
+        cached = LOGIN_CACHE.get(key)
+    if cached is not None:
+        user_id, password_hash = cached
+        user = db.session.get(User, user_id)
+        if user and hmac.compare_digest(user.password_hash, password_hash):
+            return user
+    
+    user = User.query.filter_by(username=username).first()
+    if not user or not user.check_password(password):
+        return None
+    
+    with LOGIN_CACHE_LOCK:
+        LOGIN_CACHE[key] = (user.id, user.password_hash)
+    return user
+
+def get_active_server():
+    """Return the active server's public key, endpoint and port, or None.
+
+    The active server rarely changes, so the row is cached for 30 seconds
+    and dropped by invalidate_active_server() once a VPNServer write commits.
+    """
+    with ACTIVE_SERVER_CACHE_LOCK:
+        if 'server' in ACTIVE_SERVER_CACHE:
+            return ACTIVE_SERVER_CACHE['server']
+    
+    server = db.session.execute(
+        select(VPNServer.public_key, VPNServer.endpoint, VPNServer.port)
+        .where(VPNServer.is_active)
+        .limit(1)
+    ).first()
+    with ACTIVE_SERVER_CACHE_LOCK:
+        ACTIVE_SERVER_CACHE['server'] = server
+    return server
+
+def _last_assigned_octet() -> int:
+    """Return the host octet of the most recently created client."""
+    ip_address = db.session.execute(
+        select(VPNClient.ip_address).order_by(VPNClient.id.desc()).limit(1)
+    ).scalar()
+    return int(ip_address.rsplit('.', 1)[1]) if ip_address else 1
+
+def allocate_client_ip() -> Optional[str]:
+    """Reserve the next free client address in 10.0.0.0/24.
+
+    The search starts after the last address handed out and wraps around,
+    so a deleted client's address is only reused once the rest of the pool
+    has been. Updating the pool row first takes its row lock (a write lock
+    on SQLite), which serialises concurrent allocations until commit, so two
+    requests can never be handed the same address. Returns None once every
+    host address is taken.
+    """
+    last_octet = db.session.execute(
+        update(IPPool)
+        .where(IPPool.id == 1)
+        .values(last_octet=IPPool.last_octet)
+        .returning(IPPool.last_octet)
+    ).scalar()
+    if last_octet is None:
+        raise RuntimeError("IP pool row missing; create_tables() seeds it")
+    
+    used = {int(ip_address.rsplit('.', 1)[1])
+            for ip_address in db.session.execute(select(VPNClient.ip_address)).scalars()}
+    candidates = [octet for octet in CLIENT_IP_OCTETS if octet > last_octet] + \
+                 [octet for octet in CLIENT_IP_OCTETS if octet <= last_octet]
+    octet = next((octet for octet in candidates if octet not in used), None)
+    if octet is None:
+        return None
+    
+    db.session.execute(update(IPPool).where(IPPool.id == 1).values(last_octet=octet))
+    return f"10.0.0.{octet}"
+
+def generate_keypair() -> tuple:
+    """Generate a WireGuard (Curve25519) key pair as base64 strings."""
+    private = X25519PrivateKey.generate()
+    private_key = base64.b64encode(
+        private.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+    ).decode()
+    public_key = base64.b64encode(
+        private.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    ).decode()
+    return private_key, public_key
+
+# WireGuard client config file; filled in by _build_client_config()
+CLIENT_CONFIG_TEMPLATE = (
+    "[Interface]\n"
+    "PrivateKey = %s\n"
+    "Address = %s/24\n"
+    "DNS = 8.8.8.8\n"
+    "\n"
+    "[Peer]\n"
+    "PublicKey = %s\n"
+    "Endpoint = %s:%s\n"
+    "AllowedIPs = 0.0.0.0/0\n"
+    "PersistentKeepalive = 25"
+)
+
+def _build_client_config(client, server) -> str:
+    """Render the WireGuard config file for a client."""
+    return CLIENT_CONFIG_TEMPLATE % (
+        client.private_key, client.ip_address,
+        server.public_key, server.endpoint, server.port
+    )
+
+@functools.lru_cache(maxsize=512)
+def _render_qr_png(data: str) -> bytes:
+    """Render data as a PNG QR code; configs are static per client."""
+    img_io = BytesIO()
+    segno.make_qr(data, error='m').save(img_io, kind='png', scale=10, border=5)
+    return img_io.getvalue()
+
 def generate_qr_code(data: str) -> BytesIO:
     """Generate QR code for client configuration."""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
+    return BytesIO(_render_qr_png(data))
+
+def collect_status() -> Dict:
+    """Sample WireGuard and system statistics."""
+    wg_status = get_wireguard_status()
     
-    img = qr.make_image(fill_color="black", back_color="white")
-    img_io = BytesIO()
-    img.save(img_io, 'PNG')
-    img_io.seek(0)
-    return img_io
+    # Get system stats
+    cpu_percent = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    
+    return {
+        'wireguard': wg_status,
+        'system': {
+            'cpu_percent': cpu_percent,
+            'memory': {
+                'total': memory.total,
+                'available': memory.available,
+                'percent': memory.percent
+            },
+            'disk': {
+                'total': disk.total,
+                'free': disk.free,
+                'percent': (disk.used / disk.total) * 100
+            }
+        },
+        'timestamp': datetime.utcnow()
+    }
+
+def refresh_status():
+    """Collect one status snapshot into STATUS_CACHE."""
+    try:
+        status = collect_status()
+    except Exception as e:
+        logger.error(f"Error collecting status: {e}")
+        return
+    with STATUS_CACHE_LOCK:
+        STATUS_CACHE['status'] = status
+
+def refresh_status_forever():
+    """Keep STATUS_CACHE filled so requests never sample statistics inline.
+
+    Stops once nobody has requested status for STATUS_IDLE_TIMEOUT seconds,
+    so idle workers don't keep sampling; the next request starts it again.
+    """
+    global _status_collector
+    while True:
+        with _status_collector_lock:
+            if time.monotonic() - _status_last_polled > STATUS_IDLE_TIMEOUT:
+                _status_collector = None
+                return
+        refresh_status()
+        time.sleep(STATUS_REFRESH_INTERVAL)
+
+def start_status_collector():
+    """Record a status request and make sure this process's collector runs.
+
+    Threads don't survive fork, so each worker starts its own collector on
+    first use rather than at import time.
+    """
+    global _status_collector, _status_last_polled
+    with _status_collector_lock:
+        _status_last_polled = time.monotonic()
+        if _status_collector is None or not _status_collector.is_alive():
+            _status_collector = threading.Thread(
+                target=refresh_status_forever, name='status-collector', daemon=True
+            )
+            _status_collector.start()
 
 # API Routes
 @app.route('/health', methods=['GET'])
@@ -164,22 +617,24 @@ def health_check():
     """Health check endpoint."""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
+        'timestamp': datetime.utcnow(),
         'version': '1.0.0'
     })
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     """User authentication."""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object body required'}), 400
     username = data.get('username')
     password = data.get('password')
     
     if not username or not password:
         return jsonify({'error': 'Username and password required'}), 400
     
-    user = User.query.filter_by(username=username).first()
-    if user and user.check_password(password):
+    user = authenticate(username, password)
+    if user:
         user.last_login = datetime.utcnow()
         db.session.commit()
         
@@ -196,27 +651,80 @@ def login():
     
     return jsonify({'error': 'Invalid credentials'}), 401
 
+def _int_arg(name: str, minimum: int) -> Optional[int]:
+    """Return query parameter `name` as an integer >= minimum, or None if absent.
+
+    Raises ValueError for any other value.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    number = int(value)
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
 @app.route('/api/clients', methods=['GET'])
 @jwt_required()
 def get_clients():
-    """Get all VPN clients."""
-    clients = VPNClient.query.all()
-    return jsonify([{
-        'id': client.id,
-        'name': client.name,
-        'ip_address': client.ip_address,
-        'is_active': client.is_active,
-        'created_at': client.created_at.isoformat(),
-        'last_connected': client.last_connected.isoformat() if client.last_connected else None,
-        'bytes_received': client.bytes_received,
-        'bytes_sent': client.bytes_sent
-    } for client in clients])
+    """Get VPN clients.
+
+    Pass `limit` (at most 500) and optionally `after_id` to page through
+    clients by id; when more clients remain, the id to pass as the next
+    `after_id` is returned in the X-Next-Cursor header. Requests accepting
+    application/x-ndjson instead receive one client per line; without a
+    `limit` the whole table is streamed.
+    """
+    try:
+        limit = _int_arg('limit', minimum=1)
+        after_id = _int_arg('after_id', minimum=0) or 0
+    except ValueError:
+        return jsonify({'error': 'limit must be a positive integer and after_id a non-negative one'}), 400
+    
+    # Select only the listed columns (never the private key) and skip ORM
+    # object hydration.
+    stmt = select(
+        VPNClient.id,
+        VPNClient.name,
+        VPNClient.ip_address,
+        VPNClient.is_active,
+        VPNClient.created_at,
+        VPNClient.last_connected,
+        VPNClient.bytes_received,
+        VPNClient.bytes_sent
+    ).where(VPNClient.id > after_id).order_by(VPNClient.id)
+    if limit is not None:
+        limit = min(limit, MAX_CLIENTS_PAGE_SIZE)
+        stmt = stmt.limit(limit)
+    
+    ndjson = request.accept_mimetypes.best == 'application/x-ndjson'
+    if ndjson and limit is None:
+        # Unbounded listing: stream rows as they are fetched
+        def generate():
+            rows = db.session.execute(stmt.execution_options(yield_per=500)).mappings()
+            for row in rows:
+                yield app.json.dumps(dict(row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    # A page is small enough to fetch up front, which lets the cursor header
+    # be set before the body is sent.
+    rows = db.session.execute(stmt).mappings().all()
+    if ndjson:
+        response = Response([app.json.dumps(dict(row)) + '\n' for row in rows],
+                            mimetype='application/x-ndjson')
+    else:
+        response = jsonify([dict(row) for row in rows])
+    if limit is not None and len(rows) == limit:
+        response.headers['X-Next-Cursor'] = str(rows[-1]['id'])
+    return response
 
 @app.route('/api/clients', methods=['POST'])
 @jwt_required()
 def create_client():
     """Create a new VPN client."""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object body required'}), 400
     name = data.get('name')
     
     if not name:
@@ -225,102 +733,61 @@ def create_client():
     if VPNClient.query.filter_by(name=name).first():
         return jsonify({'error': 'Client name already exists'}), 409
     
-    try:
-        # Generate client keys
-        import platform
-        if platform.system() != 'Windows':
-            try:
-                private_key_result = subprocess.run(['wg', 'genkey'], 
-                                                  capture_output=True, text=True, check=True)
-                private_key = private_key_result.stdout.strip()
-                
-                public_key_result = subprocess.run(['wg', 'pubkey'], 
-                                                 input=private_key, text=True,
-                                                 capture_output=True, check=True)
-                public_key = public_key_result.stdout.strip()
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                # Fallback to mock keys if WireGuard not available
-                private_key = f"MOCK_PRIVATE_KEY_FOR_{name.upper().replace('-', '_')}_1234567890123456789012345678901234567890"
-                public_key = f"MOCK_PUBLIC_KEY_FOR_{name.upper().replace('-', '_')}_1234567890123456789012345678901234567890"
-        else:
-            # Use mock keys for Windows
-            private_key = f"MOCK_PRIVATE_KEY_FOR_{name.upper().replace('-', '_')}_1234567890123456789012345678901234567890"
-            public_key = f"MOCK_PUBLIC_KEY_FOR_{name.upper().replace('-', '_')}_1234567890123456789012345678901234567890"
-        
-        # Get next available IP
-        last_client = VPNClient.query.order_by(VPNClient.id.desc()).first()
-        if last_client:
-            last_ip = int(last_client.ip_address.split('.')[-1])
-            new_ip = f"10.0.0.{last_ip + 1}"
-        else:
-            new_ip = "10.0.0.2"
-        
-        # Create client record
-        client = VPNClient(
-            name=name,
-            public_key=public_key,
-            private_key=private_key,
-            ip_address=new_ip
-        )
-        
-        db.session.add(client)
-        db.session.commit()
-        
-        # Add client to WireGuard configuration
-        # This would typically be done by updating the server config
-        # and reloading WireGuard
-        
-        return jsonify({
-            'id': client.id,
-            'name': client.name,
-            'ip_address': client.ip_address,
-            'public_key': public_key
-        }), 201
-        
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error generating keys: {e}")
-        return jsonify({'error': 'Failed to generate client keys'}), 500
+    # Generate client keys
+    private_key, public_key = generate_keypair()
+
+    # Get next available IP
+    new_ip = allocate_client_ip()
+    if new_ip is None:
+        return jsonify({'error': 'No client IP addresses available'}), 409
+    
+    # Create client record
+    client = VPNClient(
+        name=name,
+        public_key=public_key,
+        private_key=private_key,
+        ip_address=new_ip
+    )
+    
+    db.session.add(client)
+    db.session.commit()
+    
+    # Add client to WireGuard configuration
+    # This would typically be done by updating the server config
+    # and reloading WireGuard
+    
+    return jsonify({
+        'id': client.id,
+        'name': client.name,
+        'ip_address': client.ip_address,
+        'public_key': public_key
+    }), 201
 
 @app.route('/api/clients/<int:client_id>/config', methods=['GET'])
 @jwt_required()
 def get_client_config(client_id):
     """Get client configuration file."""
-    client = VPNClient.query.get_or_404(client_id)
+    client = db.get_or_404(VPNClient, client_id)
     
     # Get server configuration
-    server = VPNServer.query.filter_by(is_active=True).first()
+    server = get_active_server()
     if not server:
         return jsonify({'error': 'No active server found'}), 404
     
-    # Generate client configuration
-    config = f"""[Interface]
-PrivateKey = {client.private_key}
-Address = {client.ip_address}/24
-DNS = 8.8.8.8
-
-[Peer]
-PublicKey = {server.public_key}
-Endpoint = {server.endpoint}:{server.port}
-AllowedIPs = 0.0.0.0/0
-PersistentKeepalive = 25"""
-    
-    return jsonify({'config': config})
+    return jsonify({'config': _build_client_config(client, server)})
 
 @app.route('/api/clients/<int:client_id>/qr', methods=['GET'])
 @jwt_required()
 def get_client_qr(client_id):
     """Get QR code for client configuration."""
-    client = VPNClient.query.get_or_404(client_id)
-    
-    # Get client configuration
-    config_response = get_client_config(client_id)
-    if config_response[1] != 200:
-        return config_response
+    client = db.get_or_404(VPNClient, client_id)
     
-    config = config_response[0].get_json()['config']
+    server = get_active_server()
+    if not server:
+        return jsonify({'error': 'No active server found'}), 404
     
     # Generate QR code
-    qr_io = generate_qr_code(config)
+    qr_io = generate_qr_code(_build_client_config(client, server))
     
     return send_file(qr_io, mimetype='image/png')
 
@@ -328,36 +795,23 @@ def get_client_qr(client_id):
 @jwt_required()
 def get_status():
     """Get VPN server status and statistics."""
-    wg_status = get_wireguard_status()
+    if STATUS_REFRESH_INTERVAL > 0 and not app.config['TESTING']:
+        start_status_collector()
     
-    # Get system stats
-    cpu_percent = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
+    # Until the collector has run, collect at most one snapshot per TTL;
+    # holding the lock while collecting makes concurrent misses share it.
+    with STATUS_CACHE_LOCK:
+        status = STATUS_CACHE.get('status')
+        if status is None:
+            status = STATUS_CACHE['status'] = collect_status()
     
-    return jsonify({
-        'wireguard': wg_status,
-        'system': {
-            'cpu_percent': cpu_percent,
-            'memory': {
-                'total': memory.total,
-                'available': memory.available,
-                'percent': memory.percent
-            },
-            'disk': {
-                'total': disk.total,
-                'free': disk.free,
-                'percent': (disk.used / disk.total) * 100
-            }
-        },
-        'timestamp': datetime.utcnow().isoformat()
-    })
+    return jsonify(status)
 
 @app.route('/api/clients/<int:client_id>', methods=['DELETE'])
 @jwt_required()
 def delete_client(client_id):
     """Delete a VPN client."""
-    client = VPNClient.query.get_or_404(client_id)
+    client = db.get_or_404(VPNClient, client_id)
     
     # Remove from WireGuard configuration
     # This would typically involve updating the server config
@@ -373,8 +827,18 @@ def create_tables():
     with app.app_context():
         db.create_all()
         
+        # Find out which defaults are missing in a single round trip
+        has_admin, has_client, has_server, has_pool = db.session.execute(select(
+            select(User.id).filter_by(username='admin').exists(),
+            select(VPNClient.id).exists(),
+            select(VPNServer.id).exists(),
+            select(IPPool.id).exists()
+        )).one()
+        
+        created = []
+        
         # Create default admin user if none exists
-        if not User.query.filter_by(username='admin').first():
+        if not has_admin:
             admin = User(
                 username='admin',
                 email='admin@vpn.local',
@@ -382,93 +846,52 @@ def create_tables():
             )
             admin.set_password('admin123')  # Change this in production!
             db.session.add(admin)
-            db.session.commit()
-            logger.info("Created default admin user: admin/admin123")
+            created.append("default admin user: admin/admin123")
         
         # Create default VPN client if none exists
-        if not VPNClient.query.first():
-            try:
-                # Generate real client keys if WireGuard is available
-                import platform
-                if platform.system() != 'Windows':
-                    try:
-                        private_key_result = subprocess.run(['wg', 'genkey'], 
-                                                          capture_output=True, text=True, check=True)
-                        private_key = private_key_result.stdout.strip()
-                        
-                        public_key_result = subprocess.run(['wg', 'pubkey'], 
-                                                         input=private_key, text=True,
-                                                         capture_output=True, check=True)
-                        public_key = public_key_result.stdout.strip()
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        # Fallback to mock keys if WireGuard not available
-                        private_key = "mOCK_PRIVATE_KEY_FOR_DEFAULT_CLIENT_1234567890123456789012345678901234567890"
-                        public_key = "mOCK_PUBLIC_KEY_FOR_DEFAULT_CLIENT_1234567890123456789012345678901234567890"
-                else:
-                    # Use mock keys for Windows
-                    private_key = "mOCK_PRIVATE_KEY_FOR_DEFAULT_CLIENT_1234567890123456789012345678901234567890"
-                    public_key = "mOCK_PUBLIC_KEY_FOR_DEFAULT_CLIENT_1234567890123456789012345678901234567890"
-                
-                # Create default client
-                default_client = VPNClient(
-                    name='default-client',
-                    public_key=public_key,
-                    private_key=private_key,
-                    ip_address='10.0.0.2',
-                    is_active=True
-                )
-                
-                db.session.add(default_client)
-                db.session.commit()
-                logger.info("Created default VPN client: default-client")
-                
-            except Exception as e:
-                logger.error(f"Error creating default client: {e}")
+        if not has_client:
+            private_key, public_key = generate_keypair()
+            db.session.add(VPNClient(
+                name='default-client',
+                public_key=public_key,
+                private_key=private_key,
+                ip_address='10.0.0.2',
+                is_active=True
+            ))
+            created.append("default VPN client: default-client")
         
         # Create default VPN server if none exists
-        if not VPNServer.query.first():
-            try:
-                # Generate real server keys if WireGuard is available
-                import platform
-                if platform.system() != 'Windows':
-                    try:
-                        server_private_key_result = subprocess.run(['wg', 'genkey'], 
-                                                                  capture_output=True, text=True, check=True)
-                        server_private_key = server_private_key_result.stdout.strip()
-                        
-                        server_public_key_result = subprocess.run(['wg', 'pubkey'], 
-                                                                 input=server_private_key, text=True,
-                                                                 capture_output=True, check=True)
-                        server_public_key = server_public_key_result.stdout.strip()
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        # Fallback to mock keys if WireGuard not available
-                        server_private_key = "mOCK_SERVER_PRIVATE_KEY_1234567890123456789012345678901234567890"
-                        server_public_key = "mOCK_SERVER_PUBLIC_KEY_1234567890123456789012345678901234567890"
-                else:
-                    # Use mock keys for Windows
-                    server_private_key = "mOCK_SERVER_PRIVATE_KEY_1234567890123456789012345678901234567890"
-                    server_public_key = "mOCK_SERVER_PUBLIC_KEY_1234567890123456789012345678901234567890"
-                
-                # Create default server
-                default_server = VPNServer(
-                    name='default-server',
-                    public_key=server_public_key,
-                    private_key=server_private_key,
-                    endpoint='localhost',
-                    port=51820,
-                    is_active=True
-                )
-                
-                db.session.add(default_server)
-                db.session.commit()
-                logger.info("Created default VPN server: default-server")
-                
-            except Exception as e:
-                logger.error(f"Error creating default server: {e}")
+        if not has_server:
+            server_private_key, server_public_key = generate_keypair()
+            db.session.add(VPNServer(
+                name='default-server',
+                public_key=server_public_key,
+                private_key=server_private_key,
+                endpoint='localhost',
+                port=51820,
+                is_active=True
+            ))
+            created.append("default VPN server: default-server")
+        
+        # Start the IP pool after any existing client addresses
+        if not has_pool:
+            db.session.add(IPPool(id=1, last_octet=_last_assigned_octet()))
+        
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker seeded the database first
+            db.session.rollback()
+            return
+        
+        for item in created:
+            logger.info(f"Created {item}")
 
 # Initialize database on startup
 create_tables()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    # Never enable debug mode in production: it serves tracebacks and an
+    # interactive debugger to clients.
+    app.run(host='0.0.0.0', port=8080, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
 
@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration for the VPN Management API.
+
+Handlers spend most of their time waiting on the database, the `wg` CLI and
+psutil, so each worker runs a thread pool to keep serving other requests
+while one is blocked on I/O.
+"""
+
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8080')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', str(2 * multiprocessing.cpu_count() + 1)))
+
+# Without DATABASE_URL the app uses an in-memory SQLite database, which
+# lives inside a single process: extra workers would each get a private,
+# diverging copy, so serve it from one worker only.
+database_url = os.getenv('DATABASE_URL', 'sqlite:///:memory:')
+if database_url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in database_url:
+    if workers > 1:
+        print(f"gunicorn.conf.py: DATABASE_URL is in-memory; using 1 worker instead of {workers}",
+              file=sys.stderr)
+    workers = 1
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+
+# Import the app (and seed the database) once in the master so workers
+# share the loaded code copy-on-write.
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections.
+
+    Connections opened by the master while preloading must not be shared
+    across processes. In-memory SQLite is the exception: its single static
+    connection *is* the database.
+    """
+    from sqlalchemy.pool import StaticPool
+
+    from app import app, db
+
+    with app.app_context():
+        if not isinstance(db.engine.pool, StaticPool):
+            db.engine.dispose(close=False)
@@ -0,0 +1,190 @@
+"""
+Shared fixtures for the API test suite
+
+The app module is imported inside the fixtures rather than at module level,
+so collecting tests that don't use it never loads Flask or SQLAlchemy.
+"""
+
+import functools
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+# The engine is built when app is imported; always test against a private
+# in-memory database, never whatever DATABASE_URL points at.
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+TEST_CONFIG = (
+    ('TESTING', True),
+    ('JWT_SECRET_KEY', 'test-jwt-secret-key-of-at-least-32-bytes'),
+)
+
+def _tune_test_connection(dbapi_conn, connection_record=None):
+    """Drop durability guarantees a throwaway test database doesn't need."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA journal_mode=MEMORY')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+
+@functools.lru_cache(maxsize=None)
+def _configured_app(config_items):
+    """Apply a frozen test configuration and build its schema, once."""
+    from sqlalchemy import event
+    from sqlalchemy.pool import StaticPool
+    from app import app, db, IPPool
+    
+    app.config.update(dict(config_items))
+    
+    with app.app_context():
+        # Every connection must see the same in-memory database
+        assert isinstance(db.engine.pool, StaticPool), db.engine.pool
+        
+        # pysqlite defers BEGIN and mishandles SAVEPOINT; let SQLAlchemy
+        # emit transaction boundaries itself so nested transactions work.
+        with db.engine.connect() as conn:
+            conn.connection.driver_connection.isolation_level = None
+            # The startup connection already exists; tune it and any later ones
+            _tune_test_connection(conn.connection.driver_connection)
+        event.listen(db.engine, 'connect', _tune_test_connection)
+        event.listen(db.engine, 'begin', lambda conn: conn.exec_driver_sql('BEGIN'))
+        
+        # Start from an empty schema rather than the seeded startup data
+        db.drop_all()
+        db.create_all()
+        # create_tables() normally seeds the address pool
+        db.session.add(IPPool(id=1, last_octet=1))
+        db.session.commit()
+    return app
+
+@pytest.fixture(scope='session', autouse=True)
+def _stub_subprocess():
+    """Never fork real commands (e.g. `wg show`) from tests."""
+    def run(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, stdout='', stderr='')
+    
+    with patch('subprocess.run', side_effect=run) as mock_run:
+        yield mock_run
+
+@pytest.fixture(scope='session', autouse=True)
+def _cheap_password_hashing():
+    """Hash passwords with minimum-cost argon2 parameters during tests."""
+    from argon2 import PasswordHasher
+    import app as app_module
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(app_module, 'PASSWORD_HASHER',
+                   PasswordHasher(time_cost=1, memory_cost=8, parallelism=1))
+        yield
+
+@pytest.fixture(scope='session')
+def _app():
+    """The app configured for testing, shared by the whole session."""
+    return _configured_app(TEST_CONFIG)
+
+@pytest.fixture(scope='session')
+def _client(_app):
+    """One test client for the whole session; requests carry no cookie state."""
+    return _app.test_client()
+
+@pytest.fixture
+def _db_savepoint(_app):
+    """Roll back every database write made during a test."""
+    from sqlalchemy.orm import scoped_session, sessionmaker
+    import app as app_module
+    from app import db
+    
+    with _app.app_context():
+        conn = db.engine.connect()
+        trans = conn.begin()
+        
+        # Commits made by tests and request handlers only release SAVEPOINTs
+        # inside the outer transaction.
+        app_session = db.session
+        db.session = scoped_session(sessionmaker(bind=conn, join_transaction_mode='create_savepoint'))
+        for cache in (app_module.ACTIVE_SERVER_CACHE, app_module.LOGIN_CACHE,
+                      app_module.STATUS_CACHE, app_module.jwt._token_cache):
+            cache.clear()
+        
+        yield
+        
+        db.session.remove()
+        db.session = app_session
+        trans.rollback()
+        conn.close()
+
+@pytest.fixture
+def client(_client, _db_savepoint):
+    """Test client whose database writes are rolled back afterwards."""
+    return _client
+
+def _get_or_create_user(username='testuser', password='testpass'):
+    """Return the named user, creating it with the given password if missing."""
+    from app import db, User
+    
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        user = User(username=username, email=f'{username}@example.com')
+        user.set_password(password)
+        db.session.add(user)
+        db.session.flush()
+    return user
+
+@pytest.fixture
+def make_user(_db_savepoint):
+    """Get or create a user (default ``testuser``/``testpass``)."""
+    return _get_or_create_user
+
+@pytest.fixture(scope='session')
+def auth_headers(_app):
+    """Get authentication headers for test requests."""
+    from flask_jwt_extended import create_access_token
+    from app import db
+    
+    # Commit the user outside the per-test transactions and mint the token
+    # directly; logging in through the API is covered by TestAuthentication.
+    with _app.app_context():
+        user = _get_or_create_user()
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def make_client(_db_savepoint):
+    """Insert and commit a VPN client row, returning its id."""
+    from app import db, VPNClient
+    
+    def make(name='testclient', **columns):
+        values = {
+            'name': name,
+            'public_key': f'{name}_public_key',
+            'private_key': f'{name}_private_key',
+            'ip_address': '10.0.0.2',
+            **columns
+        }
+        client_id = db.session.execute(VPNClient.__table__.insert().values(values)).inserted_primary_key[0]
+        db.session.commit()
+        return client_id
+    return make
+
+@pytest.fixture
+def make_server(_db_savepoint):
+    """Insert and commit a VPN server row, returning its id."""
+    from app import db, VPNServer
+    
+    def make(name='testserver', **columns):
+        values = {
+            'name': name,
+            'public_key': 'server_public_key',
+            'private_key': 'server_private_key',
+            'endpoint': 'test.example.com',
+            'port': 51820,
+            **columns
+        }
+        server_id = db.session.execute(VPNServer.__table__.insert().values(values)).inserted_primary_key[0]
+        db.session.commit()
+        return server_id
+    return make
@@ -3,41 +3,19 @@
 Test suite for VPN Management API
 """
 
+import base64
 import pytest
 import json
 import tempfile
 import os
-from unittest.mock import patch, MagicMock
-from app import app, db, User, VPNClient, VPNServer
-
-@pytest.fixture
-def client():
-    """Create test client with temporary database."""
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    
-    with app.test_client() as client:
-        with app.app_context():
-            db.create_all()
-            yield client
-
-@pytest.fixture
-def auth_headers(client):
-    """Get authentication headers for test requests."""
-    # Create test user
-    user = User(username='testuser', email='test@example.com')
-    user.set_password('testpass')
-    db.session.add(user)
-    db.session.commit()
-    
-    # Login and get token
-    response = client.post('/api/auth/login', json={
-        'username': 'testuser',
-        'password': 'testpass'
-    })
-    
-    token = response.json['access_token']
-    return {'Authorization': f'Bearer {token}'}
+import psutil
+import socket
+import time
+from types import SimpleNamespace
+from flask_jwt_extended import JWTManager
+from sqlalchemy import update
+import app as app_module
+from app import db, IPPool, VPNClient, VPNServer, parse_wireguard_dump
 
 class TestHealthEndpoint:
     """Test health check endpoint."""
@@ -48,15 +26,44 @@ class TestHealthEndpoint:
         assert response.status_code == 200
         assert response.json['status'] == 'healthy'
 
+class TestTokenCache:
+    """Test reuse of verified JWT claims across requests."""
+    
+    @pytest.fixture
+    def decode_calls(self, monkeypatch):
+        """Count how often flask-jwt-extended actually decodes a token."""
+        calls = []
+        decode = JWTManager._decode_jwt_from_config
+        
+        def counting_decode(self, *args, **kwargs):
+            calls.append(args[0])
+            return decode(self, *args, **kwargs)
+        
+        monkeypatch.setattr(JWTManager, '_decode_jwt_from_config', counting_decode)
+        return calls
+    
+    def test_cached_token_skips_decoding(self, client, auth_headers, decode_calls):
+        """Test that a repeated token is verified only once."""
+        for _ in range(3):
+            assert client.get('/api/clients', headers=auth_headers).status_code == 200
+        
+        assert len(decode_calls) == 1
+    
+    def test_expired_claims_are_verified_again(self, client, auth_headers, decode_calls):
+        """Test that cached claims past their exp are not trusted."""
+        assert client.get('/api/clients', headers=auth_headers).status_code == 200
+        for claims in app_module.jwt._token_cache.values():
+            claims['exp'] = 0
+        
+        assert client.get('/api/clients', headers=auth_headers).status_code == 200
+        assert len(decode_calls) == 2
+
 class TestAuthentication:
     """Test authentication endpoints."""
     
-    def test_login_success(self, client):
+    def test_login_success(self, client, make_user):
         """Test successful login."""
-        # Create test user
-        user = User(username='testuser', email='test@example.com')
-        user.set_password('testpass')
-        db.session.add(user)
+        make_user()
         db.session.commit()
         
         response = client.post('/api/auth/login', json={
@@ -65,8 +72,58 @@ class TestAuthentication:
         })
         
         assert response.status_code == 200
-        assert 'access_token' in response.json
-        assert response.json['user']['username'] == 'testuser'
+        body = response.json
+        assert 'access_token' in body
+        assert body['user']['username'] == 'testuser'
+    
+    @pytest.fixture
+    def password_checks(self, monkeypatch):
+        """Count full password verifications."""
+        calls = []
+        check_password = app_module.User.check_password
+        
+        def counting_check(self, password):
+            calls.append(password)
+            return check_password(self, password)
+        
+        monkeypatch.setattr(app_module.User, 'check_password', counting_check)
+        return calls
+    
+    def _login(self, client, password):
+        return client.post('/api/auth/login', json={'username': 'cacheuser', 'password': password})
+    
+    def test_repeated_login_skips_password_check(self, client, make_user, password_checks):
+        """Test that a recently verified login is served from the cache."""
+        make_user('cacheuser', 'cachepass')
+        db.session.commit()
+        
+        assert self._login(client, 'cachepass').status_code == 200
+        assert self._login(client, 'cachepass').status_code == 200
+        assert len(password_checks) == 1
+    
+    def test_password_change_invalidates_cached_login(self, client, make_user, password_checks):
+        """Test that a cached login stops matching once the password changes."""
+        user = make_user('cacheuser', 'cachepass')
+        db.session.commit()
+        assert self._login(client, 'cachepass').status_code == 200
+        
+        user.set_password('newpass')
+        db.session.commit()
+        
+        assert self._login(client, 'cachepass').status_code == 401
+        assert self._login(client, 'newpass').status_code == 200
+    
+    def test_rehash_invalidates_cached_login(self, client, make_user, password_checks):
+        """Test that rehashing the same password forces a fresh verification."""
+        user = make_user('cacheuser', 'cachepass')
+        db.session.commit()
+        assert self._login(client, 'cachepass').status_code == 200
+        
+        user.set_password('cachepass')  # New salt, so a different hash
+        db.session.commit()
+        
+        assert self._login(client, 'cachepass').status_code == 200
+        assert len(password_checks) == 2
     
     def test_login_invalid_credentials(self, client):
         """Test login with invalid credentials."""
@@ -95,34 +152,134 @@ class TestVPNClients:
         assert response.status_code == 200
         assert response.json == []
     
+    def test_get_clients_paginated(self, client, auth_headers):
+        """Test paging through clients with a keyset cursor."""
+        db.session.execute(VPNClient.__table__.insert(), [
+            {
+                'name': f'client{i}',
+                'public_key': f'public_key_{i}',
+                'private_key': f'private_key_{i}',
+                'ip_address': f'10.0.0.{i + 2}'
+            }
+            for i in range(3)
+        ])
+        db.session.commit()
+        
+        response = client.get('/api/clients?limit=2', headers=auth_headers)
+        assert response.status_code == 200
+        assert [c['name'] for c in response.json] == ['client0', 'client1']
+        cursor = response.headers['X-Next-Cursor']
+        
+        response = client.get(f'/api/clients?limit=2&after_id={cursor}', headers=auth_headers)
+        assert response.status_code == 200
+        assert [c['name'] for c in response.json] == ['client2']
+        assert 'X-Next-Cursor' not in response.headers
+    
+    @pytest.mark.parametrize('query', ['limit=abc', 'limit=0', 'limit=-1', 'after_id=-1', 'after_id=x'])
+    def test_get_clients_invalid_paging(self, client, auth_headers, query):
+        """Test that malformed paging parameters are rejected."""
+        response = client.get(f'/api/clients?{query}', headers=auth_headers)
+        
+        assert response.status_code == 400
+        assert 'error' in response.json
+    
+    def test_get_clients_after_id_zero(self, client, auth_headers, make_client):
+        """Test that after_id=0 starts from the first client."""
+        make_client()
+        
+        response = client.get('/api/clients?limit=1&after_id=0', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert [c['name'] for c in response.json] == ['testclient']
+    
+    def test_get_clients_ndjson_paginated(self, client, auth_headers, make_client):
+        """Test that NDJSON pages carry the next cursor too."""
+        first = make_client('first', ip_address='10.0.0.2')
+        make_client('second', ip_address='10.0.0.3')
+        
+        response = client.get('/api/clients?limit=1',
+                            headers={**auth_headers, 'Accept': 'application/x-ndjson'})
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row['name'] for row in rows] == ['first']
+        assert response.headers['X-Next-Cursor'] == str(first)
+    
+    def test_get_clients_ndjson(self, client, auth_headers, make_client):
+        """Test streaming clients as newline-delimited JSON."""
+        make_client('first', ip_address='10.0.0.2')
+        make_client('second', ip_address='10.0.0.3')
+        
+        response = client.get('/api/clients',
+                            headers={**auth_headers, 'Accept': 'application/x-ndjson'})
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row['name'] for row in rows] == ['first', 'second']
+        assert all('private_key' not in row for row in rows)
+    
     def test_create_client_success(self, client, auth_headers):
         """Test creating a new VPN client."""
-        with patch('subprocess.run') as mock_run:
-            # Mock key generation
-            mock_run.side_effect = [
-                MagicMock(stdout='private_key_123\n', returncode=0),
-                MagicMock(stdout='public_key_123\n', returncode=0)
-            ]
-            
-            response = client.post('/api/clients', 
-                                 json={'name': 'testclient'},
-                                 headers=auth_headers)
-            
-            assert response.status_code == 201
-            assert response.json['name'] == 'testclient'
-            assert 'public_key' in response.json
-    
-    def test_create_client_duplicate_name(self, client, auth_headers):
+        response = client.post('/api/clients', 
+                             json={'name': 'testclient'},
+                             headers=auth_headers)
+        
+        assert response.status_code == 201
+        body = response.json
+        assert body['name'] == 'testclient'
+        assert 'public_key' in body
+    
+    def test_create_client_takes_next_free_ip(self, client, auth_headers, make_client):
+        """Test that new clients skip addresses already in use."""
+        make_client('first', ip_address='10.0.0.2')
+        make_client('third', ip_address='10.0.0.4')
+        
+        response = client.post('/api/clients',
+                             json={'name': 'testclient'},
+                             headers=auth_headers)
+        
+        assert response.status_code == 201
+        assert response.json['ip_address'] == '10.0.0.3'
+    
+    def test_create_client_wraps_to_freed_ip(self, client, auth_headers, make_client):
+        """Test that allocation wraps around to addresses freed earlier."""
+        make_client('first', ip_address='10.0.0.2')
+        db.session.execute(update(IPPool).values(last_octet=254))
+        db.session.commit()
+        
+        response = client.post('/api/clients',
+                             json={'name': 'testclient'},
+                             headers=auth_headers)
+        
+        assert response.status_code == 201
+        assert response.json['ip_address'] == '10.0.0.3'
+    
+    def test_create_client_ip_pool_exhausted(self, client, auth_headers):
+        """Test creating a client once every address is taken."""
+        db.session.execute(VPNClient.__table__.insert(), [
+            {
+                'name': f'client{octet}',
+                'public_key': f'public_key_{octet}',
+                'private_key': f'private_key_{octet}',
+                'ip_address': f'10.0.0.{octet}'
+            }
+            for octet in range(2, 255)
+        ])
+        db.session.commit()
+        
+        response = client.post('/api/clients',
+                             json={'name': 'testclient'},
+                             headers=auth_headers)
+        
+        assert response.status_code == 409
+        assert 'error' in response.json
+    
+    def test_create_client_duplicate_name(self, client, auth_headers, make_client):
         """Test creating client with duplicate name."""
         # Create first client
-        client_obj = VPNClient(
-            name='testclient',
-            public_key='public_key_123',
-            private_key='private_key_123',
-            ip_address='10.0.0.2'
-        )
-        db.session.add(client_obj)
-        db.session.commit()
+        make_client('testclient')
         
         # Try to create duplicate
         response = client.post('/api/clients',
@@ -141,34 +298,52 @@ class TestVPNClients:
         assert response.status_code == 400
         assert 'error' in response.json
     
-    def test_get_client_config(self, client, auth_headers):
+    def test_get_client_config(self, client, auth_headers, make_client, make_server):
         """Test getting client configuration."""
-        # Create test client
-        client_obj = VPNClient(
-            name='testclient',
-            public_key='client_public_key',
-            private_key='client_private_key',
-            ip_address='10.0.0.2'
-        )
-        db.session.add(client_obj)
-        
-        # Create test server
-        server = VPNServer(
-            name='testserver',
-            public_key='server_public_key',
-            private_key='server_private_key',
-            endpoint='test.example.com',
-            port=51820
-        )
-        db.session.add(server)
-        db.session.commit()
+        cid = make_client(private_key='client_private_key')
+        make_server()
         
-        response = client.get('/api/clients/1/config', headers=auth_headers)
+        response = client.get(f'/api/clients/{cid}/config', headers=auth_headers)
         
         assert response.status_code == 200
-        assert 'config' in response.json
-        assert 'client_private_key' in response.json['config']
+        body = response.json
+        assert 'config' in body
+        assert 'client_private_key' in body['config']
+        assert 'server_public_key' in body['config']
+    
+    def test_get_client_config_after_server_update(self, client, auth_headers, make_client, make_server):
+        """Test that a committed server change replaces the cached server."""
+        cid = make_client()
+        server_id = make_server()
+        response = client.get(f'/api/clients/{cid}/config', headers=auth_headers)
         assert 'server_public_key' in response.json['config']
+        
+        db.session.get(VPNServer, server_id).public_key = 'rotated_public_key'
+        db.session.commit()
+        
+        response = client.get(f'/api/clients/{cid}/config', headers=auth_headers)
+        assert 'rotated_public_key' in response.json['config']
+    
+    def test_get_client_qr(self, client, auth_headers, make_client, make_server):
+        """Test getting the client configuration as a QR code."""
+        cid = make_client()
+        make_server()
+        
+        response = client.get(f'/api/clients/{cid}/qr', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert response.data.startswith(b'\x89PNG')
+    
+    def test_get_client_qr_without_active_server(self, client, auth_headers, make_client, make_server):
+        """Test that no QR code is rendered without an active server."""
+        cid = make_client()
+        make_server(is_active=False)
+        
+        response = client.get(f'/api/clients/{cid}/qr', headers=auth_headers)
+        
+        assert response.status_code == 404
+        assert 'error' in response.json
     
     def test_get_client_config_not_found(self, client, auth_headers):
         """Test getting config for non-existent client."""
@@ -176,43 +351,31 @@ class TestVPNClients:
         
         assert response.status_code == 404
     
-    def test_delete_client(self, client, auth_headers):
+    def test_delete_client(self, client, auth_headers, make_client):
         """Test deleting a VPN client."""
-        # Create test client
-        client_obj = VPNClient(
-            name='testclient',
-            public_key='public_key_123',
-            private_key='private_key_123',
-            ip_address='10.0.0.2'
-        )
-        db.session.add(client_obj)
-        db.session.commit()
+        cid = make_client()
         
-        response = client.delete('/api/clients/1', headers=auth_headers)
+        response = client.delete(f'/api/clients/{cid}', headers=auth_headers)
         
         assert response.status_code == 200
         assert response.json['message'] == 'Client deleted successfully'
         
         # Verify client is deleted
-        deleted_client = VPNClient.query.get(1)
+        deleted_client = db.session.get(VPNClient, cid)
         assert deleted_client is None
 
 class TestStatusEndpoint:
     """Test status and monitoring endpoints."""
     
-    @patch('app.get_wireguard_status')
-    @patch('psutil.cpu_percent')
-    @patch('psutil.virtual_memory')
-    @patch('psutil.disk_usage')
-    def test_get_status(self, mock_disk, mock_memory, mock_cpu, mock_wg, client, auth_headers):
-        """Test getting system and VPN status."""
-        # Mock system stats
-        mock_cpu.return_value = 25.5
-        mock_memory.return_value = MagicMock(total=8589934592, available=4294967296, percent=50.0)
-        mock_disk.return_value = MagicMock(total=107374182400, free=53687091200, used=53687091200)
-        
-        # Mock WireGuard status
-        mock_wg.return_value = {
+    @pytest.fixture
+    def status_mocks(self, monkeypatch):
+        """Stub system stats and WireGuard status in one place."""
+        monkeypatch.setattr(psutil, 'cpu_percent', lambda *args, **kwargs: 25.5)
+        monkeypatch.setattr(psutil, 'virtual_memory', lambda: SimpleNamespace(
+            total=8589934592, available=4294967296, percent=50.0))
+        monkeypatch.setattr(psutil, 'disk_usage', lambda path: SimpleNamespace(
+            total=107374182400, free=53687091200, used=53687091200))
+        monkeypatch.setattr(app_module, 'get_wireguard_status', lambda: {
             'wg0': {
                 'peers': [
                     {
@@ -222,14 +385,109 @@ class TestStatusEndpoint:
                     }
                 ]
             }
-        }
-        
+        })
+    
+    def test_get_status(self, status_mocks, client, auth_headers):
+        """Test getting system and VPN status."""
         response = client.get('/api/status', headers=auth_headers)
         
         assert response.status_code == 200
-        assert 'wireguard' in response.json
-        assert 'system' in response.json
-        assert response.json['system']['cpu_percent'] == 25.5
+        body = response.json
+        assert 'wireguard' in body
+        assert 'system' in body
+        assert body['system']['cpu_percent'] == 25.5
+    
+    def test_collector_refreshes_status_until_idle(self, status_mocks, monkeypatch):
+        """Test one collector pass fills the cache, then an idle collector stops."""
+        monkeypatch.setattr(app_module, 'STATUS_CACHE', {})
+        monkeypatch.setattr(app_module, '_status_collector', None)
+        monkeypatch.setattr(app_module, '_status_last_polled', time.monotonic())
+        
+        def sleep(seconds):
+            # Nobody polls during the pause, so the next pass finds it idle
+            app_module._status_last_polled = float('-inf')
+        monkeypatch.setattr(app_module.time, 'sleep', sleep)
+        
+        app_module.refresh_status_forever()
+        
+        assert app_module.STATUS_CACHE['status']['system']['cpu_percent'] == 25.5
+        assert app_module._status_collector is None
+    
+    def test_idle_collector_does_not_sample(self, monkeypatch):
+        """Test a collector started with no recent request exits without sampling."""
+        calls = []
+        monkeypatch.setattr(app_module, 'collect_status', lambda: calls.append(1))
+        monkeypatch.setattr(app_module, '_status_last_polled', float('-inf'))
+        monkeypatch.setattr(app_module, '_status_collector', None)
+        
+        app_module.refresh_status_forever()
+        
+        assert calls == []
+
+class TestWireGuardParsing:
+    """Test parsing of `wg show all dump` output."""
+    
+    def test_parse_wireguard_dump(self):
+        """Test interface and peer rows are mapped to the right fields."""
+        output = (
+            "wg0\tserver_private\tserver_public\t51820\toff\n"
+            "wg0\tpeer_public\t(none)\t192.168.1.100:51820\t10.0.0.2/32\t1640995200\t1024\t2048\t25\n"
+            "wg1\tother_private\tother_public\t51821\toff\n"
+        )
+        
+        interfaces = parse_wireguard_dump(output)
+        
+        assert interfaces['wg1'] == {'peers': []}
+        assert interfaces['wg0']['peers'] == [{
+            'public_key': 'peer_public',
+            'endpoint': '192.168.1.100:51820',
+            'allowed_ips': '10.0.0.2/32',
+            'latest_handshake': '1640995200',
+            'transfer_rx': 1024,
+            'transfer_tx': 2048,
+            'persistent_keepalive': '25'
+        }]
+    
+    def test_read_wireguard_netlink(self, monkeypatch):
+        """Test peers decoded from a WireGuard netlink reply."""
+        wireguard = pytest.importorskip('pyroute2.netlink.generic.wireguard')
+        public_key = base64.b64encode(b'\x01' * 32)
+        msg = wireguard.wgmsg()
+        msg['attrs'] = [
+            ['WGDEVICE_A_IFNAME', 'wg0'],
+            ['WGDEVICE_A_PEERS', [{'attrs': [
+                ['WGPEER_A_PUBLIC_KEY', public_key],
+                ['WGPEER_A_ENDPOINT', {'addr': '192.168.1.100', 'port': 51820}],
+                ['WGPEER_A_LAST_HANDSHAKE_TIME', {'tv_sec': 1640995200, 'tv_nsec': 0}],
+                ['WGPEER_A_RX_BYTES', 1024],
+                ['WGPEER_A_TX_BYTES', 2048],
+                ['WGPEER_A_PERSISTENT_KEEPALIVE_INTERVAL', 25],
+                ['WGPEER_A_ALLOWEDIPS', [{'attrs': [
+                    ['WGALLOWEDIP_A_FAMILY', socket.AF_INET],
+                    ['WGALLOWEDIP_A_IPADDR', socket.inet_pton(socket.AF_INET, '10.0.0.2')],
+                    ['WGALLOWEDIP_A_CIDR_MASK', 32]
+                ]}]]
+            ]}]]
+        ]
+        msg.encode()
+        reply = wireguard.wgmsg(msg.data)
+        reply.decode()
+        
+        # Stands in for pyroute2's WireGuard socket, which needs the kernel module
+        fake_netlink = SimpleNamespace(info=lambda name: [reply] if name == 'wg0' else [])
+        monkeypatch.setattr(app_module, '_wg_netlink', fake_netlink)
+        monkeypatch.setattr(app_module, '_wg_netlink_available', True)
+        monkeypatch.setattr(app_module, 'WIREGUARD_INTERFACES', ['wg0'])
+        
+        assert app_module.read_wireguard_netlink() == {'wg0': {'peers': [{
+            'public_key': public_key.decode(),
+            'endpoint': '192.168.1.100:51820',
+            'allowed_ips': '10.0.0.2/32',
+            'latest_handshake': '1640995200',
+            'transfer_rx': 1024,
+            'transfer_tx': 2048,
+            'persistent_keepalive': '25'
+        }]}}
 
 class TestErrorHandling:
     """Test error handling and edge cases."""
@@ -254,70 +512,63 @@ class TestErrorHandling:
                              headers=auth_headers)
         assert response.status_code == 400
 
-class TestDatabaseModels:
-    """Test database models."""
-    
-    def test_user_password_hashing(self):
-        """Test user password hashing."""
-        user = User(username='test', email='test@example.com')
-        user.set_password('testpass')
-        
-        assert user.check_password('testpass')
-        assert not user.check_password('wrongpass')
-        assert user.password_hash != 'testpass'
-    
-    def test_vpn_client_creation(self):
-        """Test VPN client model creation."""
-        client = VPNClient(
-            name='testclient',
-            public_key='public_key',
-            private_key='private_key',
-            ip_address='10.0.0.2'
-        )
-        
-        assert client.name == 'testclient'
-        assert client.is_active == True
-        assert client.bytes_received == 0
-        assert client.bytes_sent == 0
+def run_client_lifecycle(client, auth_headers, name='lifecycle_test'):
+    """Create, list, configure and delete a client through the API."""
+    # Create client
+    response = client.post('/api/clients',
+                         json={'name': name},
+                         headers=auth_headers)
+    assert response.status_code == 201
+    client_id = response.json['id']
+    
+    # Get client list
+    response = client.get('/api/clients', headers=auth_headers)
+    assert response.status_code == 200
+    clients = response.json
+    assert len(clients) == 1
+    assert clients[0]['name'] == name
+    
+    # Get client config
+    response = client.get(f'/api/clients/{client_id}/config', headers=auth_headers)
+    assert response.status_code == 200
+    assert 'config' in response.json
+    
+    # Delete client
+    response = client.delete(f'/api/clients/{client_id}', headers=auth_headers)
+    assert response.status_code == 200
+    
+    # Verify deletion
+    response = client.get('/api/clients', headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json) == 0
 
 class TestIntegration:
     """Integration tests."""
     
-    def test_full_client_lifecycle(self, client, auth_headers):
+    def test_full_client_lifecycle(self, client, auth_headers, make_server):
         """Test complete client lifecycle."""
-        with patch('subprocess.run') as mock_run:
-            # Mock key generation
-            mock_run.side_effect = [
-                MagicMock(stdout='private_key_123\n', returncode=0),
-                MagicMock(stdout='public_key_123\n', returncode=0)
-            ]
-            
-            # Create client
-            response = client.post('/api/clients',
-                                 json={'name': 'lifecycle_test'},
-                                 headers=auth_headers)
-            assert response.status_code == 201
-            client_id = response.json['id']
-            
-            # Get client list
-            response = client.get('/api/clients', headers=auth_headers)
-            assert response.status_code == 200
-            assert len(response.json) == 1
-            assert response.json[0]['name'] == 'lifecycle_test'
-            
-            # Get client config
-            response = client.get(f'/api/clients/{client_id}/config', headers=auth_headers)
-            assert response.status_code == 200
-            assert 'config' in response.json
-            
-            # Delete client
-            response = client.delete(f'/api/clients/{client_id}', headers=auth_headers)
-            assert response.status_code == 200
-            
-            # Verify deletion
-            response = client.get('/api/clients', headers=auth_headers)
-            assert response.status_code == 200
-            assert len(response.json) == 0
+        make_server()
+        run_client_lifecycle(client, auth_headers)
+
+class TestPerformance:
+    """Timings for the heaviest request paths, tracked by pytest-benchmark.
+    
+    Benchmarking is switched off by default, so each body runs once as a
+    plain test; see CONTRIBUTING.md for timing them against the baseline.
+    """
+    
+    def test_get_client_config_perf(self, benchmark, client, auth_headers, make_client, make_server):
+        """Time rendering a client configuration."""
+        cid = make_client()
+        make_server()
+        
+        response = benchmark(client.get, f'/api/clients/{cid}/config', headers=auth_headers)
+        assert response.status_code == 200
+    
+    def test_full_client_lifecycle_perf(self, benchmark, client, auth_headers, make_server):
+        """Time creating, listing, configuring and deleting a client."""
+        make_server()
+        benchmark(run_client_lifecycle, client, auth_headers)
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests for the database models
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+@pytest.fixture
+def models():
+    """Import the models on first use so collecting this module stays cheap."""
+    import app as app_module
+    
+    return SimpleNamespace(User=app_module.User, VPNClient=app_module.VPNClient,
+                           VPNServer=app_module.VPNServer)
+
+class TestDatabaseModels:
+    """Test database models."""
+    
+    def test_user_password_hashing(self, models):
+        """Test user password hashing."""
+        user = models.User(username='test', email='test@example.com')
+        user.set_password('testpass')
+        
+        assert user.check_password('testpass')
+        assert not user.check_password('wrongpass')
+        assert user.password_hash != 'testpass'
+    
+    def test_vpn_client_creation(self, models):
+        """Test VPN client model creation."""
+        client = models.VPNClient(
+            name='testclient',
+            public_key='public_key',
+            private_key='private_key',
+            ip_address='10.0.0.2'
+        )
+        
+        assert client.name == 'testclient'
+        assert client.is_active == True
+        assert client.bytes_received == 0
+        assert client.bytes_sent == 0
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
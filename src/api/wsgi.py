@@ -0,0 +1,9 @@
+"""
+WSGI entry point for the VPN Management API.
+
+Run with: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app
+
+__all__ = ['app']